@@ -12,30 +12,42 @@ load_dotenv()
 import os
 import sys
 import logging
-import uvicorn
 from pydantic_ai import Agent, RunContext  # RunContext 임포트 추가
 from pydantic_ai.models.bedrock import BedrockConverseModel, BedrockModelSettings
 from pydantic_ai.providers.bedrock import BedrockProvider
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
+# 로깅 설정 (기본 WARNING - 요청마다 발생하는 로그 I/O 최소화, 디버깅 시 LOG_LEVEL=DEBUG)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 # ========================================
 # 환경 변수 로드 및 검증
 # ========================================
 
+# AG-UI (Starlette) debug 모드 - 개발 환경에서만 사용
+AGUI_DEBUG = os.getenv('AGUI_DEBUG', 'false') == 'true'
+
 # Bedrock 설정 (환경 변수에서 로드)
 BEDROCK_MODEL_ID = os.getenv('BEDROCK_MODEL_ID', None)
 BEDROCK_REGION = os.getenv('BEDROCK_REGION', 'ap-northeast-2')
+# Prompt cache TTL ('5m' 기본값, 사용자가 천천히 응답하는 경우 '1h')
+BEDROCK_CACHE_TTL = os.getenv('BEDROCK_CACHE_TTL', '5m')
 
 if not BEDROCK_MODEL_ID:
     logger.critical('❌ Need to specify BEDROCK_MODEL_ID in environment')
     logger.critical('   Example: BEDROCK_MODEL_ID=apac.anthropic.claude-sonnet-4-20250514-v1:0')
     sys.exit(1)
 
+if BEDROCK_CACHE_TTL not in ('5m', '1h'):
+    logger.critical(f'❌ Invalid BEDROCK_CACHE_TTL: {BEDROCK_CACHE_TTL}')
+    logger.critical("   Must be '5m' or '1h'")
+    sys.exit(1)
+
 # Server 설정
 ORCHESTRATOR_PORT = int(os.getenv("ORCHESTRATOR_PORT", 9100))
+# uvicorn worker process 수 (worker마다 별도 process이므로 in-process cache는 공유되지 않음)
+UVICORN_WORKERS = int(os.getenv("UVICORN_WORKERS", 1))
 
 # ========================================
 # Agent 생성
@@ -46,13 +58,18 @@ logger.info(f"   Model: {BEDROCK_MODEL_ID}")
 logger.info(f"   Region: {BEDROCK_REGION}")
 logger.info(f"   Credentials: Using ~/.aws/credentials")
 
+# '5m'은 Bedrock 기본 TTL이므로 ttl 필드 없이 cachePoint 전송
+bedrock_cache = True if BEDROCK_CACHE_TTL == '5m' else BEDROCK_CACHE_TTL
+
 # Bedrock 모델 설정
 bedrock_settings = BedrockModelSettings(
     parallel_tool_calls=False,  # A2A에서는 순차 실행 필요
     # Prompt caching 활성화 (비용 절감)
-    bedrock_cache_messages=True,
-    bedrock_cache_instructions=True,
-    bedrock_cache_tool_definitions=True,
+    # AG-UI 요청마다 thread의 전체 message history가 전달되므로, 마지막 user message 뒤의
+    # cachePoint로 이전 turn까지의 대화가 cache hit가 됨 (Bedrock 최대 4개 cachePoint 제한은 pydantic-ai가 처리)
+    bedrock_cache_messages=bedrock_cache,
+    bedrock_cache_instructions=bedrock_cache,
+    bedrock_cache_tool_definitions=bedrock_cache,
 )
 
 # Bedrock Provider 생성 (AWS credentials는 자동으로 ~/.aws/credentials에서 로드)
@@ -110,7 +127,7 @@ logger.info(f"[READY] Agent is ready to receive send_message_to_a2a_agent tool f
 app = orchestrator_agent.to_ag_ui(
     infer_name=False,  # Agent 이름 자동 추론 비활성화
     model_settings=bedrock_settings, # 이미 정의한 parallel_tool_calls=False 포함
-    debug=True
+    debug=AGUI_DEBUG  # 개발 시 AGUI_DEBUG=true
 )
 
 logger.info(f"✅ AG-UI ASGI app created successfully")
@@ -120,6 +137,9 @@ logger.info(f"✅ AG-UI ASGI app created successfully")
 # ========================================
 
 if __name__ == "__main__":
+    # 서버 실행 시에만 필요 (app을 import하는 worker/도구에서는 로드하지 않음)
+    import uvicorn
+
     print("=" * 80)
     print(f"[START] Starting Orchestrator Agent")
     print("=" * 80)
@@ -128,14 +148,28 @@ if __name__ == "__main__":
     print(f"[INFO] Model: {BEDROCK_MODEL_ID}")
     print(f"[INFO] Region: {BEDROCK_REGION}")
     print(f"[INFO] Credentials: Using ~/.aws/credentials")
-    print(f"[INFO] Prompt Caching: ENABLED")
+    print(f"[INFO] Prompt Caching: ENABLED (TTL: {BEDROCK_CACHE_TTL})")
     print(f"[INFO] AG-UI Protocol: ENABLED (via agent.to_ag_ui())")
     print(f"[INFO] A2A Middleware: READY TO RECEIVE TOOLS")
     print(f"[INFO] Parallel Tool Calls: DISABLED (Sequential execution)")
-    print(f"[INFO] Message History: Fresh start for each request")
+    print(f"[INFO] Workers: {UVICORN_WORKERS}")
+    print(f"[INFO] Message History: Cached per AG-UI thread (last user message)")
     print("=" * 80)
     print(f"[TIP] A2A middleware will inject send_message_to_a2a_agent tool")
     print(f"[TIP] Access the agent at: POST http://localhost:{ORCHESTRATOR_PORT}/")
     print("=" * 80)
     
-    uvicorn.run(app, host="0.0.0.0", port=ORCHESTRATOR_PORT)
\ No newline at end of file
+    # workers > 1 은 import string으로 app을 지정해야 함 (worker마다 module을 import)
+    # workers == 1 이면 이미 만든 app 객체를 넘겨 module이 __main__과 orchestrator으로 두 번 import되지 않게 함
+    # loop/http "auto": uvloop, httptools가 설치되어 있으면 사용 (uvicorn[standard])
+    uvicorn.run(
+        "orchestrator:app" if UVICORN_WORKERS > 1 else app,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host="0.0.0.0",
+        port=ORCHESTRATOR_PORT,
+        loop="auto",
+        http="auto",
+        workers=UVICORN_WORKERS,
+        access_log=False,
+        log_level=LOG_LEVEL.lower(),
+    )
\ No newline at end of file
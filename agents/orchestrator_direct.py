@@ -10,82 +10,167 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import asyncio
 import sys
 import json
+import hashlib
+import itertools
 import logging
-import uvicorn
+import time
+from datetime import date
+from dataclasses import dataclass
+from contextlib import asynccontextmanager
 import httpx
+import msgspec
+from cachetools import TTLCache
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.bedrock import BedrockConverseModel, BedrockModelSettings
 from pydantic_ai.providers.bedrock import BedrockProvider
-
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+from pydantic_ai.ui.ag_ui import AGUIAdapter
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
 
 # ========================================
 # 환경 변수 로드 및 검증
 # ========================================
 
-# Bedrock 설정 (환경 변수에서 로드)
-BEDROCK_MODEL_ID = os.getenv('BEDROCK_MODEL_ID', None)
-BEDROCK_REGION = os.getenv('BEDROCK_REGION', 'ap-northeast-2')
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Environment configuration for the direct orchestrator, read once at import.
+
+    With gunicorn `--preload` the instance is created in the master process and
+    shared copy-on-write by every forked worker.
+    """
+
+    # 로깅 (기본 WARNING - 요청마다 발생하는 로그 I/O 최소화, 디버깅 시 LOG_LEVEL=DEBUG)
+    log_level: str
+    # AG-UI (Starlette) debug 모드 - 개발 환경에서만 사용
+    agui_debug: bool
+    # Bedrock 설정
+    bedrock_model_id: str | None
+    bedrock_region: str
+    # Prompt cache TTL ('5m' 기본값, 사용자가 천천히 응답하는 경우 '1h')
+    bedrock_cache_ttl: str
+    # Server 설정 (포트 9103으로 변경)
+    port: int
+    # uvicorn worker process 수 (worker마다 별도 process이므로 in-process cache는 공유되지 않음)
+    workers: int
+    # Agent URLs
+    research_url: str
+    analysis_url: str
+    # Local result cache (UI retry/reload 시 동일 요청의 downstream 호출 생략)
+    enable_local_result_cache: bool
+    # Agent 호출에 HTTP/2 사용 (httpx[http2] 필요)
+    a2a_http2: bool
+
+    @classmethod
+    def from_env(cls) -> Settings:
+        return cls(
+            log_level=os.getenv('LOG_LEVEL', 'WARNING').upper(),
+            agui_debug=os.getenv('AGUI_DEBUG', 'false') == 'true',
+            bedrock_model_id=os.getenv('BEDROCK_MODEL_ID', None),
+            bedrock_region=os.getenv('BEDROCK_REGION', 'ap-northeast-2'),
+            bedrock_cache_ttl=os.getenv('BEDROCK_CACHE_TTL', '5m'),
+            port=int(os.getenv("ORCHESTRATOR_DIRECT_PORT", 9103)),
+            workers=int(os.getenv("UVICORN_WORKERS", 1)),
+            research_url=os.getenv('RESEARCH_AGENT_URL', 'http://localhost:9101'),
+            analysis_url=os.getenv('ANALYSIS_AGENT_URL', 'http://localhost:9102'),
+            enable_local_result_cache=os.getenv('ENABLE_LOCAL_RESULT_CACHE', '0') == '1',
+            a2a_http2=os.getenv('A2A_HTTP2', 'true') == 'true',
+        )
+
+SETTINGS = Settings.from_env()
 
-if not BEDROCK_MODEL_ID:
+# 로깅 설정
+logging.basicConfig(level=SETTINGS.log_level)
+logger = logging.getLogger(__name__)
+
+if not SETTINGS.bedrock_model_id:
     logger.critical('❌ Need to specify BEDROCK_MODEL_ID in environment')
     logger.critical('   Example: BEDROCK_MODEL_ID=apac.anthropic.claude-sonnet-4-20250514-v1:0')
     sys.exit(1)
 
-# Server 설정 (포트 9103으로 변경)
-ORCHESTRATOR_DIRECT_PORT = int(os.getenv("ORCHESTRATOR_DIRECT_PORT", 9103))
-
-# Agent URLs
-RESEARCH_AGENT_URL = os.getenv('RESEARCH_AGENT_URL', 'http://localhost:9101')
-ANALYSIS_AGENT_URL = os.getenv('ANALYSIS_AGENT_URL', 'http://localhost:9102')
+if SETTINGS.bedrock_cache_ttl not in ('5m', '1h'):
+    logger.critical(f'❌ Invalid BEDROCK_CACHE_TTL: {SETTINGS.bedrock_cache_ttl}')
+    logger.critical("   Must be '5m' or '1h'")
+    sys.exit(1)
 
 # ========================================
 # Agent Creation (must be done first)
 # ========================================
 
 logger.info(f"[INIT] Initializing AWS Bedrock provider")
-logger.info(f"   Model: {BEDROCK_MODEL_ID}")
-logger.info(f"   Region: {BEDROCK_REGION}")
+logger.info(f"   Model: {SETTINGS.bedrock_model_id}")
+logger.info(f"   Region: {SETTINGS.bedrock_region}")
 logger.info(f"   Credentials: Using ~/.aws/credentials")
 
+# '5m'은 Bedrock 기본 TTL이므로 ttl 필드 없이 cachePoint 전송
+bedrock_cache = True if SETTINGS.bedrock_cache_ttl == '5m' else SETTINGS.bedrock_cache_ttl
+
 # Bedrock 모델 설정
 bedrock_settings = BedrockModelSettings(
     parallel_tool_calls=False,  # Sequential execution needed
     # Prompt caching 활성화 (비용 절감)
-    bedrock_cache_messages=True,
-    bedrock_cache_instructions=True,
-    bedrock_cache_tool_definitions=True,
+    # AG-UI 요청마다 thread의 전체 message history가 전달되므로, 마지막 user message 뒤의
+    # cachePoint로 이전 turn까지의 대화가 cache hit가 됨 (Bedrock 최대 4개 cachePoint 제한은 pydantic-ai가 처리)
+    bedrock_cache_messages=bedrock_cache,
+    bedrock_cache_instructions=bedrock_cache,
+    bedrock_cache_tool_definitions=bedrock_cache,  # tools 배열 뒤 cachePoint (tool docstring은 고정된 내용 유지)
 )
 
 # Bedrock Provider 생성 (AWS credentials는 자동으로 ~/.aws/credentials에서 로드)
 bedrock_provider = BedrockProvider(
-    region_name=BEDROCK_REGION,
+    region_name=SETTINGS.bedrock_region,
 )
 
-# Bedrock 모델 생성
-bedrock_model = BedrockConverseModel(
-    model_name=BEDROCK_MODEL_ID,
+class CacheLoggingBedrockConverseModel(BedrockConverseModel):
+    """BedrockConverseModel that logs prompt cache read/write tokens for every request."""
+
+    async def request(self, *args, **kwargs):
+        response = await super().request(*args, **kwargs)
+        _log_cache_usage(response.usage)
+        return response
+
+    @asynccontextmanager
+    async def request_stream(self, *args, **kwargs):
+        async with super().request_stream(*args, **kwargs) as streamed_response:
+            yield streamed_response
+        _log_cache_usage(streamed_response.get().usage)
+
+def _log_cache_usage(usage) -> None:
+    """Log Bedrock cacheReadInputTokens / cacheWriteInputTokens to verify prompt cache hits."""
+    logger.info(
+        "[CACHE] input=%s cache_read=%s cache_write=%s",
+        usage.input_tokens, usage.cache_read_tokens, usage.cache_write_tokens,
+    )
+
+# Bedrock 모델 생성 (cache 사용량 로깅 포함)
+bedrock_model = CacheLoggingBedrockConverseModel(
+    model_name=SETTINGS.bedrock_model_id,
     provider=bedrock_provider
 )
 
 logger.info(f"✅ AWS Bedrock provider initialized successfully")
 
 # System Prompt - Direct HTTP tools 사용을 위해 수정
-system_prompt = """
+# (a) 고정된 header: bedrock_cache_instructions가 이 뒤에 cachePoint를 추가하며,
+#     Claude Sonnet의 최소 캐시 크기(1024 tokens)를 넘어야 cache hit가 발생함
+# (b) 변하는 footer: system_prompt_dynamic() - cachePoint 뒤에 위치하므로 cache prefix에 영향 없음
+SYSTEM_PROMPT_STATIC = """
 You are a research orchestrator. Your goal is to provide a complete research and analysis report by collaborating with specialized agents through direct HTTP calls.
 
 **TOOLS AVAILABLE:**
 - `call_research_agent(query, instruction)`: Make direct HTTP call to Research Agent. Use 'instruction' parameter to provide detailed research instructions.
+- `run_parallel_research(queries, instruction)`: Research several independent sub-topics at once. Pass the list of sub-topics (at most 5) in 'queries' and one shared detailed instruction; returns ONE merged research JSON object with the findings of every sub-topic, in the same format as `call_research_agent`.
 - `call_analysis_agent(research_data, instruction)`: Make direct HTTP call to Analysis Agent. Use 'instruction' parameter to specify what analysis to perform.
 
 **WORKFLOW:**
 You MUST execute ALL the following steps sequentially in a single turn - DO NOT STOP until all steps are complete:
 
 1. **Research Phase**: Call `call_research_agent` with both the user's query AND a detailed instruction describing exactly what you want the research agent to investigate.
+   - If the user's request covers several independent sub-topics (e.g. "compare X, Y and Z"), make ONE `run_parallel_research` call with the list of sub-topics instead of calling `call_research_agent` repeatedly.
 
 2. **Analysis Phase**: IMMEDIATELY after receiving research results, you MUST call `call_analysis_agent` with the complete research data AND a detailed instruction describing what specific analysis you want performed. This step is MANDATORY - never skip it.
 
@@ -95,12 +180,45 @@ You MUST execute ALL the following steps sequentially in a single turn - DO NOT
 - You must complete ALL THREE phases in one response
 - DO NOT send a response without calling both agents
 - Always provide detailed instructions in the 'instruction' parameter for both tools
-- These instructions will be shown to users in the frontend
+- The 'instruction' parameter is REQUIRED on every tool call - it is displayed to users in the frontend
 
 Examples:
 - Research instruction: "Research Pydantic AI comprehensively, including its core features, architectural design, key benefits, use cases, recent developments, and ecosystem comparisons"
 - Analysis instruction: "Analyze the research findings to identify key market trends, competitive advantages, technical strengths/weaknesses, and provide strategic recommendations for adoption"
 
+**TOOL-USAGE PLAYBOOK:**
+
+Writing research instructions:
+- Restate the user's topic in full; never rely on pronouns or earlier context the research agent cannot see
+- Name the aspects to cover (definition, core features, architecture, benefits, limitations, use cases, recent developments, comparisons)
+- Mention the intended audience and depth when the user implies one (e.g. "for beginners", "for a technical decision")
+- Keep the 'query' parameter short (the topic itself) and put every detail in 'instruction'
+
+Splitting into sub-topics:
+- Use `run_parallel_research` only when the sub-topics can be researched independently of each other
+- Give every sub-topic a short, self-contained name (e.g. "Rust memory safety", "Go concurrency model")
+- Keep the shared instruction generic enough to apply to every sub-topic
+- Use at most 5 sub-topics; group closely related ones together
+- Do not split a single topic just to get more results
+
+Writing analysis instructions:
+- Say what decision or question the analysis should support
+- Ask for concrete insights with their importance, not a restatement of the research
+- Point out comparisons, trade-offs, risks, or trends the analysis should focus on
+- Pass the research agent's JSON output to 'research_data' exactly as received, without summarizing or reformatting it
+
+Handling tool results:
+- Research and analysis results are JSON strings; copy them verbatim into the data markers
+- If a tool returns a message starting with "Error:" or "❌", do not retry more than once; explain the failure in the summary and still include whatever data you received
+- `run_parallel_research` already merges all sub-topics into one research JSON object; treat it exactly like a `call_research_agent` result (pass it to `call_analysis_agent` and copy it into RESEARCH_DATA_START)
+- Never invent research or analysis data that the agents did not return
+
+Writing the final summary:
+- Start with a one-paragraph overview that answers the user's question directly
+- Highlight the three to five most important findings and insights in plain language
+- Close with a short recommendation or next step when the user asked for one
+- Keep the summary in the user's language; keep the JSON inside the markers unchanged
+
 **IMPORTANT FOR FRONTEND DISPLAY**: You MUST call both tools explicitly so the user can see the A2A message flow visualization. Do not skip the `call_analysis_agent` tool call.
 
 **CRITICAL DATA FORMATTING REQUIREMENT**:
@@ -125,7 +243,7 @@ ANALYSIS_DATA_START: {"topic": "Quantum Computing", "overview": "The analysis re
 
 **MANDATORY RESPONSE CHECKLIST:**
 Before sending your response, verify you have:
-✓ Called call_research_agent with detailed instruction
+✓ Called call_research_agent (or run_parallel_research) with detailed instruction
 ✓ Called call_analysis_agent with research data and detailed instruction
 ✓ Included RESEARCH_DATA_START: {json} :RESEARCH_DATA_END marker
 ✓ Included ANALYSIS_DATA_START: {json} :ANALYSIS_DATA_END marker
@@ -139,140 +257,404 @@ Before sending your response, verify you have:
 - Pass the complete research results to the analysis agent
 """
 
+@dataclass(slots=True)
+class OrchestratorDeps:
+    """Per-run dependencies shared with the tools (last instructions sent to each agent)."""
+    research_instruction: str | None = None
+    analysis_instruction: str | None = None
+
 # Agent 생성 - Direct HTTP tools 포함
+# instructions는 message history가 있는 follow-up turn에서도 매 요청마다 포함됨
 orchestrator_agent = Agent(
     model=bedrock_model,
-    system_prompt=system_prompt,
+    instructions=SYSTEM_PROMPT_STATIC,
+    deps_type=OrchestratorDeps,
     model_settings=bedrock_settings,
     name='orchestrator_direct_agent',
     retries=2,
 )
 
+@orchestrator_agent.instructions
+def system_prompt_dynamic() -> str:
+    """Small per-request footer placed after the cached static prompt."""
+    return f"Current date: {date.today().isoformat()}"
+
 logger.info(f"✅ Agent '{orchestrator_agent.name}' created successfully")
 
+# ========================================
+# Shared HTTP Client (keep-alive connection pool)
+# ========================================
+
+# Research/Analysis agent 호출에 재사용되는 단일 클라이언트
+# (tool 호출마다 TCP handshake를 반복하지 않도록 connection pool 유지)
+# HTTP/2는 TLS(ALPN)로 협상되는 경우에만 사용됨 - 예: h2를 지원하는 reverse proxy 뒤의 agent.
+# 평문 http:// agent URL은 기존처럼 HTTP/1.1 keep-alive로 동작
+# transport의 retries는 connection 단계 오류(연결 실패/timeout)만 exponential backoff로 재시도
+HTTP_CLIENT = httpx.AsyncClient(
+    timeout=httpx.Timeout(30.0, connect=3.0, pool=5.0),
+    transport=httpx.AsyncHTTPTransport(
+        retries=2,
+        limits=httpx.Limits(
+            max_connections=50,
+            max_keepalive_connections=50,
+            keepalive_expiry=300.0,
+        ),
+        http2=SETTINGS.a2a_http2,
+    ),
+)
+
+# ========================================
+# Circuit Breaker (downstream agent 장애 시 fail fast)
+# ========================================
+
+class CircuitOpenError(Exception):
+    """Raised when a downstream agent's circuit breaker is open."""
+
+class CircuitBreaker:
+    """Fail fast after repeated failures calling one downstream agent.
+
+    Opens after `threshold` consecutive failures and rejects calls for `ttl` seconds.
+    The first call after that is let through as a trial: success closes the circuit,
+    failure opens it for another `ttl` seconds.
+    """
+
+    def __init__(self, name: str, threshold: int = 5, ttl: float = 30.0):
+        self.name = name
+        self.threshold = threshold
+        self.ttl = ttl
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @asynccontextmanager
+    async def context(self):
+        if self._opened_at is not None:
+            if time.monotonic() - self._opened_at < self.ttl:
+                raise CircuitOpenError(f"{self.name} circuit is open after {self._failures} consecutive failures")
+            # Half-open: re-arm the timer so only this trial call gets through
+            self._opened_at = time.monotonic()
+
+        try:
+            yield
+        except httpx.PoolTimeout:
+            # Local connection pool backpressure, not a downstream failure
+            raise
+        except Exception:
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+                logger.warning(f"[CIRCUIT] {self.name} circuit opened for {self.ttl}s")
+            raise
+        else:
+            self._failures = 0
+            self._opened_at = None
+
+# Agent URL별 circuit breaker
+CIRCUIT_BREAKERS = {
+    SETTINGS.research_url: CircuitBreaker("Research Agent"),
+    SETTINGS.analysis_url: CircuitBreaker("Analysis Agent"),
+}
+
+# ========================================
+# A2A JSON-RPC Helper
+# ========================================
+
+# message/send JSON-RPC 요청/응답 schema
+# msgspec.Struct는 중간 dict 없이 field를 바로 bytes로 encode/decode함
+class Part(msgspec.Struct):
+    text: str
+
+class Message(msgspec.Struct):
+    messageId: str
+    parts: list[Part]
+    role: str = "user"
+
+class Params(msgspec.Struct):
+    message: Message
+
+class RpcRequest(msgspec.Struct, kw_only=True):
+    jsonrpc: str = "2.0"
+    method: str = "message/send"
+    id: int
+    params: Params
+
+class ResponsePart(msgspec.Struct):
+    text: str | None = None
+
+class RpcResult(msgspec.Struct):
+    # Message 형태의 result만 parts를 가짐 (그 외에는 None)
+    parts: list[ResponsePart] | None = None
+
+class RpcResponse(msgspec.Struct):
+    id: int | str | None = None
+    result: RpcResult | None = None
+    error: dict | None = None
+
+_RPC_ENCODER = msgspec.json.Encoder()
+_RPC_DECODER = msgspec.json.Decoder(RpcResponse)
+_RPC_HEADERS = {"Content-Type": "application/json"}
+
+# 요청마다 고유한 JSON-RPC id (동시 요청의 응답을 id로 구분)
+_RPC_ID = itertools.count(1)
+
+async def _send_a2a_message(agent_url: str, agent_name: str, text: str) -> str:
+    """Send a `message/send` JSON-RPC request to an A2A agent and return its text reply.
+
+    Args:
+        agent_url: Base URL of the A2A agent
+        agent_name: Display name used in log messages
+        text: Message text to send to the agent
+    """
+    rpc_id = next(_RPC_ID)
+    # Same text -> same messageId, so identical requests stay byte-identical for downstream caching
+    message_id = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    body = _RPC_ENCODER.encode(
+        RpcRequest(id=rpc_id, params=Params(message=Message(messageId=message_id, parts=[Part(text=text)])))
+    )
+
+    # A2A agents expect JSON-RPC format at root endpoint
+    # Stream the body so error statuses fail before any of it is downloaded
+    async with CIRCUIT_BREAKERS[agent_url].context():
+        async with HTTP_CLIENT.stream(
+            "POST",
+            f"{agent_url}/",
+            content=body,
+            headers=_RPC_HEADERS
+        ) as response:
+            response.raise_for_status()
+            response_body = await response.aread()
+        # 해석할 수 없는 응답(proxy error page 등)과 id 불일치도 breaker failure로 집계
+        rpc_response = _RPC_DECODER.decode(response_body)
+        if rpc_response.result is not None and rpc_response.id != rpc_id:
+            raise ValueError(f"JSON-RPC response id {rpc_response.id} does not match request id {rpc_id}")
+
+    # Extract result from JSON-RPC response
+    if rpc_response.result is not None:
+        # Extract JSON from the message structure
+        for part in rpc_response.result.parts or ():
+            if part.text is not None:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"[HTTP] {agent_name} Response: {part.text[:200]}...")
+                return part.text
+
+        # Not a text message (e.g. a Task) - fall back to the generic decode
+        result = msgspec.json.decode(response_body)["result"]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[HTTP] {agent_name} Response: {str(result)[:200]}...")
+        return str(result)
+    else:
+        error = rpc_response.error or "Unknown error"
+        logger.error(f"[HTTP] {agent_name} Error: {error}")
+        return f"Error: {error}"
+
+# sha256(request text) -> agent reply, 5분 TTL
+RESEARCH_CACHE = TTLCache(maxsize=512, ttl=300)
+ANALYSIS_CACHE = TTLCache(maxsize=512, ttl=300)
+
+# (agent URL, sha256(request text)) -> 진행 중인 요청
+# 동일한 요청(UI retry 등)이 동시에 들어오면 downstream 호출 하나를 공유
+_IN_FLIGHT: dict[tuple[str, bytes], asyncio.Task] = {}
+
+async def _send_a2a_message_cached(cache: TTLCache, agent_url: str, agent_name: str, text: str) -> str:
+    """Same as `_send_a2a_message`, but deduplicates identical requests.
+
+    Identical requests that are already in flight share one downstream call. With
+    ENABLE_LOCAL_RESULT_CACHE=1, successful replies are also reused for 5 minutes.
+    Both are keyed on the sha256 of the request text.
+    """
+    key = hashlib.sha256(text.encode()).digest()
+
+    if SETTINGS.enable_local_result_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.debug("[CACHE] %s local result cache hit", agent_name)
+            return cached
+
+    flight_key = (agent_url, key)
+    task = _IN_FLIGHT.get(flight_key)
+    if task is None:
+        task = asyncio.ensure_future(_send_a2a_message(agent_url, agent_name, text))
+        _IN_FLIGHT[flight_key] = task
+        task.add_done_callback(lambda _: _IN_FLIGHT.pop(flight_key, None))
+    else:
+        logger.debug("[CACHE] %s joined identical in-flight request", agent_name)
+
+    # shield: a cancelled caller must not cancel the call other callers are waiting on
+    result = await asyncio.shield(task)
+    if SETTINGS.enable_local_result_cache and not result.startswith("Error:"):
+        cache[key] = result
+    return result
+
 # ========================================
 # Custom Tools for Direct HTTP Communication (using decorators)
 # ========================================
 
 @orchestrator_agent.tool
-async def call_research_agent(ctx: RunContext, query: str, instruction: str) -> str:
+async def call_research_agent(ctx: RunContext[OrchestratorDeps], query: str, instruction: str) -> str:
     """Call research agent directly via HTTP to gather information about a topic.
 
     Args:
         query: The basic research query
-        instruction: Detailed instruction for what the agent should research (REQUIRED for frontend display)
+        instruction: Detailed instruction for what the agent should research
     """
     # Debug logging to track parameter passing
-    logger.info(f"[DEBUG] Tool called with query='{query}', instruction='{instruction}'")
+    logger.debug("[DEBUG] Tool called with query='%s', instruction='%s'", query, instruction)
 
     # Use the instruction as the primary research task
     research_task = instruction
-    logger.info(f"[HTTP] Calling Research Agent: {research_task}")
+    logger.debug("[HTTP] Calling Research Agent: %s", research_task)
 
     # Store the instruction in context for frontend access
-    if hasattr(ctx, 'deps') and ctx.deps:
-        ctx.deps['research_instruction'] = research_task
+    ctx.deps.research_instruction = research_task
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # A2A agents expect JSON-RPC format at root endpoint
-            response = await client.post(
-                f"{RESEARCH_AGENT_URL}/",
-                json={
-                    "jsonrpc": "2.0",
-                    "method": "message/send",
-                    "id": 1,
-                    "params": {
-                        "message": {
-                            "messageId": f"msg-{1}",
-                            "role": "user",
-                            "parts": [{"text": research_task}]  # Send the detailed instruction
-                        }
-                    }
-                },
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
-            response_json = response.json()
-            # Extract result from JSON-RPC response
-            if "result" in response_json:
-                result = response_json["result"]
-                logger.info(f"[HTTP] Research Agent Response: {str(result)[:200]}...")
-
-                # Extract JSON from the message structure
-                if isinstance(result, dict) and "parts" in result:
-                    for part in result["parts"]:
-                        if "text" in part:
-                            return part["text"]
-
-                return str(result)
-            else:
-                error = response_json.get("error", "Unknown error")
-                logger.error(f"[HTTP] Research Agent Error: {error}")
-                return f"Error: {error}"
+        # Send the detailed instruction
+        return await _send_a2a_message_cached(RESEARCH_CACHE, SETTINGS.research_url, "Research Agent", research_task)
+
+    except CircuitOpenError as e:
+        error_msg = f"❌ Research Agent temporarily unavailable: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+    except httpx.PoolTimeout as e:
+        error_msg = f"❌ Research Agent connection pool exhausted: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
 
     except Exception as e:
         error_msg = f"❌ Failed to call Research Agent: {str(e)}"
         logger.error(error_msg)
         return error_msg
 
+# run_parallel_research 한 번에 허용되는 최대 sub-topic 수 (각 sub-topic이 downstream LLM 호출 1회)
+MAX_PARALLEL_RESEARCH = 5
+
+def _merge_research_results(queries: list[str], results: list[str]) -> str:
+    """Merge per-sub-topic research JSON into one object in the research agent's format.
+
+    Sub-topics that failed (or did not return JSON) are listed under "errors".
+    If every sub-topic failed, the error messages are returned as plain text instead.
+    """
+    summaries, findings, sources, errors = [], [], [], []
+    for query, result in zip(queries, results):
+        try:
+            research = msgspec.json.decode(result)
+        except msgspec.DecodeError:
+            research = None
+        if not isinstance(research, dict) or not isinstance(research.get("findings"), list):
+            errors.append(f"{query}: {result}")
+            continue
+
+        if research.get("summary"):
+            summaries.append(f"{query}: {research['summary']}")
+        for finding in research["findings"]:
+            if isinstance(finding, dict):
+                findings.append({**finding, "title": f"[{query}] {finding.get('title', '')}"})
+        # LLM 출력은 schema 검증을 거치지 않으므로 문자열인 sources만 모음
+        if isinstance(research.get("sources"), str) and research["sources"] and research["sources"] not in sources:
+            sources.append(research["sources"])
+
+    if not findings:
+        return "❌ Research failed for every sub-topic:\n" + "\n".join(errors)
+
+    merged = {
+        "topic": ", ".join(queries),
+        "summary": "\n".join(summaries),
+        "findings": findings,
+        "sources": " ".join(sources),
+    }
+    if errors:
+        merged["errors"] = errors
+    return msgspec.json.encode(merged).decode()
+
+@orchestrator_agent.tool
+async def run_parallel_research(ctx: RunContext[OrchestratorDeps], queries: list[str], instruction: str) -> str:
+    """Call research agent concurrently for several independent sub-topics and merge the results.
+
+    Args:
+        queries: Independent sub-topics to research (at most 5), one research call per item
+        instruction: Detailed instruction applied to every sub-topic
+    """
+    # Debug logging to track parameter passing
+    logger.debug("[DEBUG] Parallel research tool called with queries=%s, instruction='%s'", queries, instruction)
+
+    # fan-out 크기는 model이 정하므로 상한을 둠
+    if not queries or len(queries) > MAX_PARALLEL_RESEARCH:
+        error_msg = (
+            f"❌ run_parallel_research needs 1 to {MAX_PARALLEL_RESEARCH} sub-topics, got {len(queries)}. "
+            f"Group related sub-topics and call again."
+        )
+        logger.error(error_msg)
+        return error_msg
+
+    # One research task per sub-topic, all sharing the same instruction
+    research_tasks = [f"{instruction}\n\nFOCUS: {query}" for query in queries]
+    logger.debug("[HTTP] Calling Research Agent for %d sub-topics in parallel", len(research_tasks))
+
+    # Store the instruction in context for frontend access
+    ctx.deps.research_instruction = instruction
+
+    # Fan out all research calls at once; one failing sub-topic must not cancel the others
+    results = await asyncio.gather(
+        *[
+            _send_a2a_message_cached(RESEARCH_CACHE, SETTINGS.research_url, "Research Agent", task)
+            for task in research_tasks
+        ],
+        return_exceptions=True,
+    )
+
+    outputs = []
+    for query, result in zip(queries, results):
+        if isinstance(result, CircuitOpenError):
+            error_msg = f"❌ Research Agent temporarily unavailable for '{query}': {str(result)}"
+            logger.error(error_msg)
+            outputs.append(error_msg)
+        elif isinstance(result, httpx.PoolTimeout):
+            error_msg = f"❌ Research Agent connection pool exhausted for '{query}': {str(result)}"
+            logger.error(error_msg)
+            outputs.append(error_msg)
+        elif isinstance(result, Exception):
+            error_msg = f"❌ Failed to call Research Agent for '{query}': {str(result)}"
+            logger.error(error_msg)
+            outputs.append(error_msg)
+        else:
+            outputs.append(result)
+
+    # frontend와 data marker는 research JSON 하나만 읽으므로 sub-topic 결과를 하나로 합침
+    return _merge_research_results(queries, outputs)
+
 @orchestrator_agent.tool
-async def call_analysis_agent(ctx: RunContext, research_data: str, instruction: str) -> str:
+async def call_analysis_agent(ctx: RunContext[OrchestratorDeps], research_data: str, instruction: str) -> str:
     """Call analysis agent directly via HTTP to analyze research findings.
 
     Args:
         research_data: The research data to analyze
-        instruction: Detailed instruction for what analysis to perform (REQUIRED for frontend display)
+        instruction: Detailed instruction for what analysis to perform
     """
     # Debug logging to track parameter passing
-    logger.info(f"[DEBUG] Analysis tool called with instruction='{instruction}'")
+    logger.debug("[DEBUG] Analysis tool called with instruction='%s'", instruction)
 
     # Create a comprehensive analysis request with the instruction
     analysis_request = f"INSTRUCTION: {instruction}\n\nRESEARCH DATA TO ANALYZE:\n{research_data}"
 
-    logger.info(f"[HTTP] Calling Analysis Agent with research data and instruction")
+    logger.debug("[HTTP] Calling Analysis Agent with research data and instruction")
 
     # Store the instruction in context for frontend access
-    if hasattr(ctx, 'deps') and ctx.deps:
-        ctx.deps['analysis_instruction'] = instruction
+    ctx.deps.analysis_instruction = instruction
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # A2A agents expect JSON-RPC format at root endpoint
-            response = await client.post(
-                f"{ANALYSIS_AGENT_URL}/",
-                json={
-                    "jsonrpc": "2.0",
-                    "method": "message/send",
-                    "id": 2,
-                    "params": {
-                        "message": {
-                            "messageId": f"msg-{2}",
-                            "role": "user",
-                            "parts": [{"text": analysis_request}]
-                        }
-                    }
-                },
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
-            response_json = response.json()
-            # Extract result from JSON-RPC response
-            if "result" in response_json:
-                result = response_json["result"]
-                logger.info(f"[HTTP] Analysis Agent Response: {str(result)[:200]}...")
-
-                # Extract JSON from the message structure
-                if isinstance(result, dict) and "parts" in result:
-                    for part in result["parts"]:
-                        if "text" in part:
-                            return part["text"]
-
-                return str(result)
-            else:
-                error = response_json.get("error", "Unknown error")
-                logger.error(f"[HTTP] Analysis Agent Error: {error}")
-                return f"Error: {error}"
+        # analysis_request에 instruction과 research_data가 모두 포함되므로 research가 바뀌면 cache key도 바뀜
+        return await _send_a2a_message_cached(ANALYSIS_CACHE, SETTINGS.analysis_url, "Analysis Agent", analysis_request)
+
+    except CircuitOpenError as e:
+        error_msg = f"❌ Analysis Agent temporarily unavailable: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+    except httpx.PoolTimeout as e:
+        error_msg = f"❌ Analysis Agent connection pool exhausted: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
 
     except Exception as e:
         error_msg = f"❌ Failed to call Analysis Agent: {str(e)}"
@@ -282,14 +664,30 @@ async def call_analysis_agent(ctx: RunContext, research_data: str, instruction:
 logger.info(f"[READY] Agent has direct HTTP tools for research and analysis agents")
 
 # ========================================
-# AG-UI ASGI 앱 생성 (agent.to_ag_ui() 사용)
+# AG-UI ASGI 앱 생성 (AGUIAdapter.dispatch_request() 사용)
 # ========================================
 
+@asynccontextmanager
+async def lifespan(app):
+    """Close the shared HTTP client when the server shuts down."""
+    yield
+    await HTTP_CLIENT.aclose()
+
+async def run_agent(request: Request) -> Response:
+    """Run the orchestrator for one AG-UI request and stream its events back."""
+    return await AGUIAdapter.dispatch_request(
+        request,
+        agent=orchestrator_agent,
+        deps=OrchestratorDeps(),  # 요청마다 새 deps (동시 요청끼리 instruction을 덮어쓰지 않음)
+        model_settings=bedrock_settings, # parallel_tool_calls=False 포함
+        infer_name=False,  # Agent 이름 자동 추론 비활성화
+    )
+
 # AG-UI 프로토콜을 지원하는 ASGI 앱 생성
-app = orchestrator_agent.to_ag_ui(
-    infer_name=False,  # Agent 이름 자동 추론 비활성화
-    model_settings=bedrock_settings, # parallel_tool_calls=False 포함
-    debug=True
+app = Starlette(
+    debug=SETTINGS.agui_debug,  # 개발 시 AGUI_DEBUG=true
+    routes=[Route("/", run_agent, methods=["POST"])],
+    lifespan=lifespan,  # 종료 시 HTTP_CLIENT 정리
 )
 
 logger.info(f"✅ AG-UI ASGI app created successfully")
@@ -299,23 +697,40 @@ logger.info(f"✅ AG-UI ASGI app created successfully")
 # ========================================
 
 if __name__ == "__main__":
+    # 서버 실행 시에만 필요 (app을 import하는 worker/도구에서는 로드하지 않음)
+    import uvicorn
+
     print("=" * 80)
     print(f"[START] Starting Direct Orchestrator Agent")
     print("=" * 80)
-    print(f"[INFO] Server URL: http://localhost:{ORCHESTRATOR_DIRECT_PORT}")
+    print(f"[INFO] Server URL: http://localhost:{SETTINGS.port}")
     print(f"[INFO] Provider: AWS Bedrock")
-    print(f"[INFO] Model: {BEDROCK_MODEL_ID}")
-    print(f"[INFO] Region: {BEDROCK_REGION}")
+    print(f"[INFO] Model: {SETTINGS.bedrock_model_id}")
+    print(f"[INFO] Region: {SETTINGS.bedrock_region}")
     print(f"[INFO] Credentials: Using ~/.aws/credentials")
-    print(f"[INFO] Prompt Caching: ENABLED")
-    print(f"[INFO] AG-UI Protocol: ENABLED (via agent.to_ag_ui())")
+    print(f"[INFO] Prompt Caching: ENABLED (TTL: {SETTINGS.bedrock_cache_ttl})")
+    print(f"[INFO] AG-UI Protocol: ENABLED (via AGUIAdapter)")
     print(f"[INFO] Communication: DIRECT HTTP CALLS")
-    print(f"[INFO] Research Agent: {RESEARCH_AGENT_URL}")
-    print(f"[INFO] Analysis Agent: {ANALYSIS_AGENT_URL}")
+    print(f"[INFO] Research Agent: {SETTINGS.research_url}")
+    print(f"[INFO] Analysis Agent: {SETTINGS.analysis_url}")
     print(f"[INFO] Parallel Tool Calls: DISABLED (Sequential execution)")
+    print(f"[INFO] Workers: {SETTINGS.workers}")
     print("=" * 80)
     print(f"[TIP] This agent bypasses A2A middleware for testing")
-    print(f"[TIP] Access the agent at: POST http://localhost:{ORCHESTRATOR_DIRECT_PORT}/")
+    print(f"[TIP] Access the agent at: POST http://localhost:{SETTINGS.port}/")
     print("=" * 80)
 
-    uvicorn.run(app, host="0.0.0.0", port=ORCHESTRATOR_DIRECT_PORT)
\ No newline at end of file
+    # workers > 1 은 import string으로 app을 지정해야 함 (worker마다 module을 import)
+    # workers == 1 이면 이미 만든 app 객체를 넘겨 module이 __main__과 orchestrator_direct으로 두 번 import되지 않게 함
+    # loop/http "auto": uvloop, httptools가 설치되어 있으면 사용 (uvicorn[standard])
+    uvicorn.run(
+        "orchestrator_direct:app" if SETTINGS.workers > 1 else app,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host="0.0.0.0",
+        port=SETTINGS.port,
+        loop="auto",
+        http="auto",
+        workers=SETTINGS.workers,
+        access_log=False,
+        log_level=SETTINGS.log_level.lower(),
+    )
\ No newline at end of file
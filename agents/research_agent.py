@@ -4,6 +4,7 @@ Exposes A2A Protocol endpoint, returns structured JSON.
 """
 
 import uvicorn
+import asyncio
 import json
 import os
 from dotenv import load_dotenv
@@ -119,7 +120,8 @@ class ResearchAgent:
     async def invoke(self, message: Message) -> str:
         """Process A2A message and return research JSON."""
         message_text = message.parts[0].root.text
-        result = self.graph.invoke({
+        # graph.invoke는 동기 LLM 호출로 블로킹되므로 thread에서 실행 (동시 요청이 event loop를 막지 않음)
+        result = await asyncio.to_thread(self.graph.invoke, {
             "message": message_text,
             "research": "",
             "structured_research": None
@@ -76,6 +76,7 @@ const ChatInner = ({ onResearchUpdate, onAnalysisUpdate }: ChatProps) => {
 
         // Handle Direct Orchestrator action results
         if ((msg.type === "ResultMessage" && msg.actionName === "call_research_agent") ||
+            (msg.type === "ResultMessage" && msg.actionName === "run_parallel_research") ||
             (msg.type === "ResultMessage" && msg.actionName === "call_analysis_agent")) {
           try {
             console.log("[CHAT-ENHANCED] Direct Orchestrator action result:", msg.actionName, msg.result);
@@ -254,6 +255,48 @@ const ChatInner = ({ onResearchUpdate, onAnalysisUpdate }: ChatProps) => {
     },
   });
 
+  // Register Direct Orchestrator Parallel Research action
+  useCopilotAction({
+    name: "run_parallel_research",
+    description: "Calls Research Agent directly via HTTP for several sub-topics in parallel",
+    available: "frontend",
+    parameters: [
+      {
+        name: "queries",
+        type: "string[]",
+        description: "The independent sub-topics to research",
+      },
+      {
+        name: "instruction",
+        type: "string",
+        description: "Detailed instruction applied to every sub-topic",
+        required: true,
+      },
+    ],
+    render: (actionRenderProps) => {
+      // Transform props to match A2A format
+      const queries = actionRenderProps.args.queries || [];
+      const task = queries.length > 0
+        ? `${actionRenderProps.args.instruction} (${queries.join(", ")})`
+        : actionRenderProps.args.instruction;
+
+      const a2aProps = {
+        ...actionRenderProps,
+        args: {
+          agentName: "Research Agent",
+          task: task,
+        },
+      };
+
+      return (
+        <>
+          <MessageToA2A {...a2aProps} />
+          <MessageFromA2A {...a2aProps} />
+        </>
+      );
+    },
+  });
+
   // Register Direct Orchestrator Analysis Agent action
   useCopilotAction({
     name: "call_analysis_agent",